@@ -1,9 +1,13 @@
 import json
 import os
 import sys
-import pymysql
 import shutil
-from tabulate import tabulate
+from array import array
+from collections import Counter, OrderedDict
+from functools import partial
+
+# pymysql, tabulate и asyncio импортируются лениво внутри функций,
+# чтобы пакетный режим (run_cli) запускался быстро
 
 # Отключаем создание папки __pycache__ и .pyc файлов
 sys.dont_write_bytecode = True
@@ -22,6 +26,34 @@ LAYOUT_MAPPING = str.maketrans(RU_CHARS, EN_CHARS)
 
 USER_LOGS = []
 
+# Окно консоли не растягиваем больше этих размеров
+MAX_WINDOW_COLS = 400
+MAX_WINDOW_LINES = 300
+
+# Профилирование колонок: размер выборки и кэш результатов по таблицам
+PROFILE_SAMPLE_SIZE = 10000
+PROFILE_FETCH_BATCH = 1000
+PROFILE_TOP_VALUES = 3
+PROFILE_PK_CHUNK = 100
+PROFILE_SCAN_TIMEOUT_MS = 10000
+PROFILE_SKETCH_MAX_ROWS = 1000000
+PROFILE_CACHE = {}
+
+# Страницы результатов в manage_table: размер страницы и лимит памяти кэша
+PAGE_SIZE = 50
+PAGE_SIZE_MAX = 100000
+PAGE_VIEW_ROWS = 50
+PAGE_FETCH_BATCH = 1000
+PAGE_CACHE_BUDGET = 64 * 1024 * 1024
+
+# Параллельный запуск по многим шаблонам/схемам
+FANOUT_CONCURRENCY = 8
+FANOUT_TIMEOUT = 30
+FANOUT_ROW_LIMIT = 50
+FANOUT_FETCH_BATCH = 1000
+FANOUT_QUEUE_SIZE = 16
+SYSTEM_SCHEMAS = {"information_schema", "mysql", "performance_schema", "sys"}
+
 COLUMN_TYPES = [
     ("---", "[ NUMBERS ]", ""),
     ("INT", "Standard integer", "1, 42, -500"),
@@ -99,6 +131,8 @@ def resize_window(cols=99, req_lines=35):
     if os.name == 'nt':
         if is_window_maximized():
             return
+        cols = min(cols, MAX_WINDOW_COLS)
+        req_lines = min(req_lines, MAX_WINDOW_LINES)
         # 1. Попытка через старый mode (для обычного cmd.exe)
         os.system(f'mode con: cols={cols} lines={req_lines}')
         # 2. Попытка через ANSI-последовательность
@@ -187,47 +221,530 @@ def save_templates(templates):
     with open(CONFIG_FILE, "w", encoding="utf-8") as f:
         json.dump(data, f, indent=4, ensure_ascii=False)
 
+def open_connection(ip, port, user, password, database, timeout=None):
+    import pymysql
+    return pymysql.connect(
+        host=ip,
+        port=int(port),
+        user=user,
+        password=password,
+        database=database,
+        charset='utf8mb4',
+        connect_timeout=timeout or 10,
+        read_timeout=timeout,
+        write_timeout=timeout
+    )
+
 def connect_to_db(ip, port, user, password, database):
     try:
         print(f"Connecting to {ip}:{port} as user {user} to DB '{database}'...")
-        connection = pymysql.connect(
-            host=ip,
-            port=int(port),
-            user=user,
-            password=password,
-            database=database,
-            charset='utf8mb4'
-        )
+        connection = open_connection(ip, port, user, password, database)
         print("Successful connection!")
         explore_tables(connection, database)
         connection.close()
     except Exception as e:
         print(f"Connection error: {e}")
 
+MASK64 = (1 << 64) - 1
+INTEGER_SQL_TYPES = {"tinyint", "smallint", "mediumint", "int", "bigint"}
+SCAN_TIMEOUT_ERROR = 3024  # ER_QUERY_TIMEOUT: MAX_EXECUTION_TIME exceeded
+
+class HyperLogLog:
+    def __init__(self, precision=12):
+        self.precision = precision
+        self.size = 1 << precision
+        self.registers = bytearray(self.size)
+
+    def add(self, value):
+        # splitmix64 finaliser: hash() of an int is the int itself, so spread its bits first
+        h = (hash(value) + 0x9E3779B97F4A7C15) & MASK64
+        h = ((h ^ (h >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+        h = ((h ^ (h >> 27)) * 0x94D049BB133111EB) & MASK64
+        h ^= h >> 31
+        rest_bits = 64 - self.precision
+        index = h >> rest_bits
+        rank = rest_bits - (h & ((1 << rest_bits) - 1)).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def count(self):
+        import math
+        m = self.size
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        # Поправка для малых кардинальностей (linear counting)
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+def _scan_hint():
+    # MySQL 5.7.8+ stops the statement on the server; other servers treat it as a comment
+    return f"/*+ MAX_EXECUTION_TIME({int(PROFILE_SCAN_TIMEOUT_MS)}) */"
+
+def _is_scan_timeout(error):
+    return bool(error.args) and error.args[0] == SCAN_TIMEOUT_ERROR
+
+def _table_meta(connection, table_name):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT TABLE_ROWS FROM information_schema.TABLES "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+            (table_name,)
+        )
+        row = cursor.fetchone()
+        total_rows = int(row[0] or 0) if row else 0
+        cursor.execute(
+            "SELECT COLUMN_NAME, DATA_TYPE FROM information_schema.COLUMNS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_KEY = 'PRI'",
+            (table_name,)
+        )
+        pk_columns = cursor.fetchall()
+    # Only a single integer primary key can be sampled by ranges
+    int_pk = pk_columns[0][0] if len(pk_columns) == 1 and pk_columns[0][1].lower() in INTEGER_SQL_TYPES else None
+    return total_rows, int_pk
+
+def _read_columns(connection, query, params=None):
+    import pymysql.cursors
+    # SSCursor streams rows instead of buffering the whole result on the client
+    cursor = connection.cursor(pymysql.cursors.SSCursor)
+    try:
+        cursor.execute(query, params)
+        columns = [desc[0] for desc in cursor.description]
+        values = [[] for _ in columns]
+        while True:
+            batch = cursor.fetchmany(PROFILE_FETCH_BATCH)
+            if not batch:
+                break
+            # Transpose the batch into per-column lists
+            for col_values, batch_col in zip(values, zip(*batch)):
+                col_values.extend(batch_col)
+    finally:
+        cursor.close()
+    return columns, values
+
+def _sample_pk_ranges(connection, table_name, pk, limit):
+    import random
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT MIN(`{pk}`), MAX(`{pk}`) FROM `{table_name}`")
+        low, high = cursor.fetchone()
+    if low is None:
+        return _read_columns(connection, f"SELECT * FROM `{table_name}` LIMIT 0")
+
+    with connection.cursor() as cursor:
+        # Short index range reads at random starting keys: cost is bounded by the sample, not the table
+        sampled = {}
+        columns = None
+        for _ in range(-(-limit // PROFILE_PK_CHUNK)):
+            cursor.execute(
+                f"SELECT * FROM `{table_name}` WHERE `{pk}` >= %s ORDER BY `{pk}` LIMIT {int(PROFILE_PK_CHUNK)}",
+                (random.randint(low, high),)
+            )
+            if columns is None:
+                columns = [desc[0] for desc in cursor.description]
+                pk_index = columns.index(pk)
+            for row in cursor.fetchall():
+                # Neighbouring ranges may overlap
+                sampled[row[pk_index]] = row
+    rows = list(sampled.values())[:limit]
+    return columns, [list(col) for col in zip(*rows)] if rows else [[] for _ in columns]
+
+def sample_table(connection, table_name, limit=PROFILE_SAMPLE_SIZE):
+    total_rows, pk = _table_meta(connection, table_name)
+    if total_rows <= limit:
+        columns, values = _read_columns(connection, f"SELECT * FROM `{table_name}` LIMIT {int(limit)}")
+        # TABLE_ROWS is only an estimate; a full LIMIT means the table is bigger than it says
+        method = "full table" if not values or len(values[0]) < limit else "first rows"
+        return columns, values, total_rows, method
+
+    if pk:
+        columns, values = _sample_pk_ranges(connection, table_name, pk, limit)
+        return columns, values, total_rows, "random primary key ranges"
+
+    import pymysql
+    try:
+        # Random sample without ORDER BY RAND(): the server drops rows while scanning.
+        # No oversampling, otherwise LIMIT would stop the scan before the end of the table
+        columns, values = _read_columns(
+            connection,
+            f"SELECT {_scan_hint()} * FROM `{table_name}` WHERE RAND() < %s LIMIT {int(limit)}",
+            (limit / total_rows,)
+        )
+        return columns, values, total_rows, "random scan"
+    except pymysql.err.OperationalError as e:
+        if not _is_scan_timeout(e):
+            raise
+    columns, values = _read_columns(connection, f"SELECT * FROM `{table_name}` LIMIT {int(limit)}")
+    return columns, values, total_rows, "first rows (random scan timed out)"
+
+def sketch_distinct(connection, table_name, column_count):
+    # One streaming pass; each column keeps only a fixed-size HyperLogLog, not its values
+    import pymysql
+    import pymysql.cursors
+    sketches = [HyperLogLog() for _ in range(column_count)]
+    scanned = 0
+    complete = True
+    cursor = connection.cursor(pymysql.cursors.SSCursor)
+    try:
+        cursor.execute(f"SELECT {_scan_hint()} * FROM `{table_name}` LIMIT {int(PROFILE_SKETCH_MAX_ROWS) + 1}")
+        while True:
+            batch = cursor.fetchmany(PROFILE_FETCH_BATCH)
+            if not batch:
+                break
+            scanned += len(batch)
+            for sketch, batch_col in zip(sketches, zip(*batch)):
+                add = sketch.add
+                for value in batch_col:
+                    if value is not None:
+                        add(value)
+    except pymysql.err.OperationalError as e:
+        if not _is_scan_timeout(e):
+            raise
+        complete = False
+    finally:
+        cursor.close()
+    if scanned > PROFILE_SKETCH_MAX_ROWS:
+        complete = False
+    return [sketch.count() for sketch in sketches], min(scanned, PROFILE_SKETCH_MAX_ROWS), complete
+
+def _short_value(value, width=20):
+    text = value.hex() if isinstance(value, (bytes, bytearray)) else str(value)
+    return text if len(text) <= width else text[:width - 3] + "..."
+
+def profile_column(values, distinct=None):
+    sample_size = len(values)
+    counts = Counter(values)
+    nulls = counts.pop(None, 0)
+    non_null = sample_size - nulls
+    stats = {
+        "nulls": f"{nulls}/{sample_size} ({nulls * 100 / sample_size:.1f}%)" if sample_size else "-",
+        "distinct": "-",
+        "min": "-",
+        "max": "-",
+        "lengths": "-",
+        "top": "-",
+    }
+    if not counts:
+        return stats
+
+    stats["distinct"] = distinct if distinct is not None else str(len(counts))
+
+    # min, max and lengths in a single loop over the distinct values
+    low = high = None
+    orderable = True
+    len_min, len_max, len_total = None, 0, 0
+    for value, n in counts.items():
+        length = len(value) if isinstance(value, (bytes, bytearray)) else len(str(value))
+        len_min = length if len_min is None else min(len_min, length)
+        len_max = max(len_max, length)
+        len_total += length * n
+        if orderable:
+            try:
+                if low is None or value < low:
+                    low = value
+                if high is None or value > high:
+                    high = value
+            except TypeError:
+                # Mixed types in one column cannot be ordered
+                orderable = False
+    if orderable:
+        stats["min"] = _short_value(low)
+        stats["max"] = _short_value(high)
+    stats["lengths"] = f"{len_min}/{len_total / non_null:.1f}/{len_max}"
+
+    top = counts.most_common(PROFILE_TOP_VALUES)
+    stats["top"] = ", ".join(f"{_short_value(v, 12)} ({n})" for v, n in top)
+    return stats
+
+def profile_table(connection, table_name):
+    with connection.cursor() as cursor:
+        cursor.execute(f"DESCRIBE `{table_name}`")
+        col_types = {col[0]: col[1] for col in cursor.fetchall()}
+
+    columns, values, total_rows, method = sample_table(connection, table_name)
+    sample_size = len(values[0]) if values else 0
+
+    distinct = [None] * len(columns)
+    distinct_note = "exact"
+    if method != "full table":
+        # The sample cannot tell how many distinct values the whole table has
+        counts, scanned, complete = sketch_distinct(connection, table_name, len(columns))
+        distinct = [f"~{n}" if complete else f">~{n}" for n in counts]
+        distinct_note = f"estimated (HyperLogLog) over {scanned} rows" + ("" if complete else ", scan stopped early")
+
+    rows = []
+    for col_name, col_values, col_distinct in zip(columns, values, distinct):
+        col_type = col_types.get(col_name, "unknown")
+        stats = profile_column(col_values, col_distinct)
+        rows.append([
+            col_name, col_type, stats["nulls"], stats["distinct"], stats["min"], stats["max"],
+            stats["lengths"], stats["top"], get_type_guide(col_type)
+        ])
+    return {
+        "sample_size": sample_size, "total_rows": total_rows, "method": method,
+        "distinct_note": distinct_note, "rows": rows
+    }
+
+def get_table_profile(connection, db_name, table_name, refresh=False):
+    key = (connection.host, connection.port, db_name, table_name)
+    if refresh or key not in PROFILE_CACHE:
+        PROFILE_CACHE[key] = profile_table(connection, table_name)
+    return PROFILE_CACHE[key]
+
+def invalidate_table_profile(connection, db_name, table_name):
+    PROFILE_CACHE.pop((connection.host, connection.port, db_name, table_name), None)
+
+def show_table_profile(connection, db_name, table_name):
+    from tabulate import tabulate
+    refresh = False
+    while True:
+        try:
+            profile = get_table_profile(connection, db_name, table_name, refresh)
+        except Exception as e:
+            add_log(f"Error profiling table: {e}")
+            return
+        refresh = False
+
+        profile_output = tabulate(
+            profile["rows"],
+            headers=["Column", "Type", "Nulls", "Distinct", "Min", "Max", "Len min/avg/max", "Top values", "Guide"],
+            tablefmt="grid"
+        )
+        profile_lines = profile_output.split('\n')
+        req_cols = max((len(line) for line in profile_lines), default=0) + 4
+        # Title(1), Sample(1), Table(len), Sep(1), Refresh/Back(2), Gap(3), Prompt(1) = 9
+        req_lines = len(profile_lines) + len(USER_LOGS) + 9
+        resize_window(max(99, req_cols), req_lines)
+        clear_screen()
+
+        print(f"=== Profile of '{table_name}' in DB '{db_name}' ===")
+        print(f"Sampled {profile['sample_size']} of ~{profile['total_rows']} rows ({profile['method']}), "
+              f"distinct counts {profile['distinct_note']}")
+        print(profile_output)
+        print("-" * 20)
+        print("r. Refresh profile")
+        print("b. Return to table\n")
+
+        print_logs_with_gap(3)
+
+        choice = get_input("Select action: ").lower()
+        if choice == 'r':
+            refresh = True
+            add_log(f"Profile of '{table_name}' refreshed")
+        elif choice == 'b' or not choice:
+            break
+        else:
+            add_log(f"Invalid choice: {choice}")
+
+def field_kind(type_code):
+    from pymysql.constants import FIELD_TYPE
+    if type_code in (FIELD_TYPE.TINY, FIELD_TYPE.SHORT, FIELD_TYPE.LONG,
+                     FIELD_TYPE.LONGLONG, FIELD_TYPE.INT24, FIELD_TYPE.YEAR):
+        return "int"
+    if type_code in (FIELD_TYPE.FLOAT, FIELD_TYPE.DOUBLE):
+        return "float"
+    return "text"
+
+class ColumnBuffer:
+    def __init__(self, kind):
+        self.kind = kind
+        self.binary = False
+        self.length = 0
+        self.nulls = bytearray()
+        if kind == "int":
+            self.data = array("q")
+        elif kind == "float":
+            self.data = array("d")
+        else:
+            self.data = bytearray()
+            self.offsets = array("Q", [0])
+
+    def append(self, value):
+        index = self.length
+        if index % 8 == 0:
+            self.nulls.append(0)
+        if value is None:
+            self.nulls[index >> 3] |= 1 << (index & 7)
+
+        if self.kind in ("int", "float"):
+            try:
+                self.data.append(0 if value is None else value)
+                self.length += 1
+                return
+            except (OverflowError, TypeError):
+                # BIGINT UNSIGNED and friends do not fit into array('q')
+                self._convert_to_text()
+
+        if value is None:
+            encoded = b""
+        elif isinstance(value, (bytes, bytearray)):
+            self.binary = True
+            encoded = value
+        else:
+            encoded = str(value).encode("utf-8")
+        self.data += encoded
+        self.offsets.append(len(self.data))
+        self.length += 1
+
+    def _convert_to_text(self):
+        old_values = self.data
+        self.kind = "text"
+        self.data = bytearray()
+        self.offsets = array("Q", [0])
+        for i, value in enumerate(old_values):
+            if not self.is_null(i):
+                self.data += str(value).encode("utf-8")
+            self.offsets.append(len(self.data))
+
+    def is_null(self, index):
+        return bool(self.nulls[index >> 3] & (1 << (index & 7)))
+
+    def get(self, index):
+        if self.is_null(index):
+            return None
+        if self.kind in ("int", "float"):
+            return self.data[index]
+        raw = bytes(self.data[self.offsets[index]:self.offsets[index + 1]])
+        return raw if self.binary else raw.decode("utf-8", errors="replace")
+
+    @property
+    def nbytes(self):
+        size = len(self.nulls) + len(self.data) * getattr(self.data, "itemsize", 1)
+        if self.kind == "text":
+            size += len(self.offsets) * self.offsets.itemsize
+        return size
+
+class RowView:
+    __slots__ = ("page", "index")
+
+    def __init__(self, page, index):
+        self.page = page
+        self.index = index
+
+    def __len__(self):
+        return len(self.page.buffers)
+
+    def __getitem__(self, col):
+        return self.page.buffers[col].get(self.index)
+
+    def __iter__(self):
+        return (buffer.get(self.index) for buffer in self.page.buffers)
+
+class ColumnPage:
+    def __init__(self, description):
+        self.columns = [desc[0] for desc in description]
+        self.buffers = []
+        for desc in description:
+            self.buffers.append(ColumnBuffer(field_kind(desc[1])))
+        self.length = 0
+
+    def extend(self, rows):
+        for row in rows:
+            for buffer, value in zip(self.buffers, row):
+                buffer.append(value)
+            self.length += 1
+
+    def rows(self, start=0, stop=None):
+        stop = self.length if stop is None else min(stop, self.length)
+        return [RowView(self, i) for i in range(start, stop)]
+
+    @property
+    def nbytes(self):
+        return sum(buffer.nbytes for buffer in self.buffers)
+
+class PageCache:
+    def __init__(self, budget=PAGE_CACHE_BUDGET):
+        self.budget = budget
+        self.nbytes = 0
+        self.pages = OrderedDict()
+
+    def get(self, key):
+        page = self.pages.get(key)
+        if page is not None:
+            self.pages.move_to_end(key)
+        return page
+
+    def put(self, key, page):
+        if key in self.pages:
+            self.nbytes -= self.pages.pop(key).nbytes
+        self.pages[key] = page
+        self.nbytes += page.nbytes
+        # Вытесняем самые старые страницы, но текущую оставляем всегда
+        while self.nbytes > self.budget and len(self.pages) > 1:
+            _, old_page = self.pages.popitem(last=False)
+            self.nbytes -= old_page.nbytes
+
+    def clear(self):
+        self.pages.clear()
+        self.nbytes = 0
+
+def read_page(connection, query, batch_size=PAGE_FETCH_BATCH):
+    import pymysql.cursors
+    # SSCursor decodes rows in batches instead of materialising the whole result
+    cursor = connection.cursor(pymysql.cursors.SSCursor)
+    try:
+        cursor.execute(query)
+        page = ColumnPage(cursor.description)
+        while True:
+            batch = cursor.fetchmany(batch_size)
+            if not batch:
+                break
+            page.extend(batch)
+    finally:
+        cursor.close()
+    return page
+
+def get_table_page(page_cache, connection, table_name, page_number, page_size=PAGE_SIZE, refresh=False):
+    key = (page_number, page_size)
+    page = None if refresh else page_cache.get(key)
+    if page is None:
+        page = read_page(connection, f"SELECT * FROM `{table_name}` LIMIT {int(page_size)} OFFSET {int(page_number) * int(page_size)}")
+        page_cache.put(key, page)
+    return page
+
 def manage_table(connection, db_name, table_name):
+    from tabulate import tabulate
+    # Pages are cached only while this table is open and are re-read after the table
+    # is changed; only a window of PAGE_VIEW_ROWS rows of the page is rendered
+    page_cache = PageCache()
+    page_number = 0
+    page_size = PAGE_SIZE
+    view_start = 0  # -1 means "last window of the page"
+    refresh = True
     while True:
         table_output = "(Table is empty)"
         table_lines = table_output.split('\n')
+        req_cols = 0
+        page = None
+        position = ""
         
         try:
-            with connection.cursor() as cursor:
-                cursor.execute(f"SELECT * FROM `{table_name}` LIMIT 50")
-                rows = cursor.fetchall()
-                if rows:
-                    columns = [desc[0] for desc in cursor.description]
-                    table_output = tabulate(rows, headers=columns, tablefmt="grid")
-                    table_lines = table_output.split('\n')
-                    req_cols = max((len(line) for line in table_lines), default=0) + 4
+            page = get_table_page(page_cache, connection, table_name, page_number, page_size, refresh)
+            refresh = False
+            if page.length == 0 and page_number > 0:
+                page_number -= 1
+                view_start = -1
+                add_log("No more rows")
+                continue
+            if view_start < 0:
+                view_start = max(0, (page.length - 1) // PAGE_VIEW_ROWS * PAGE_VIEW_ROWS)
+            if page.length:
+                visible = page.rows(view_start, view_start + PAGE_VIEW_ROWS)
+                first_row = page_number * page_size + view_start + 1
+                position = f", rows {first_row}-{first_row + len(visible) - 1}"
+                table_output = tabulate(visible, headers=page.columns, tablefmt="grid")
+                table_lines = table_output.split('\n')
+                req_cols = max((len(line) for line in table_lines), default=0) + 4
         except Exception as e:
             table_output = f"(Error reading table: {e})"
             table_lines = table_output.split('\n')
 
-        # Calculation: Title(1), Table(len), Actions(2), Items(5), Sep(1), Back(2), Gap(3), Prompt(1) = 15
-        req_lines = len(table_lines) + len(USER_LOGS) + 15
+        # Calculation: Title(1), Table(len), Actions(2), Items(6), Sep(1), Pages/Back(5), Gap(3), Prompt(1) = 19
+        req_lines = len(table_lines) + len(USER_LOGS) + 19
         resize_window(max(99, req_cols), req_lines)
         clear_screen()
         
-        print(f"=== Table '{table_name}' in DB '{db_name}' ===")
+        print(f"=== Table '{table_name}' in DB '{db_name}' (page {page_number + 1} of {page_size} rows{position}) ===")
         print(table_output)
             
         print("\nActions:")
@@ -236,15 +753,56 @@ def manage_table(connection, db_name, table_name):
         print("3. Add row")
         print("4. Delete row")
         print("5. Edit row")
+        print("6. Profile columns")
         
         print("-" * 20)
+        print("n. Next rows")
+        print("p. Previous rows")
+        print("s. Set page size")
         print("b. Return to tables list\n")
         
         print_logs_with_gap(3)
         
         choice = get_input("Select action: ").lower()
         
-        if choice == 'b':
+        if choice in ('1', '2', '3', '4', '5'):
+            # Any change to the table makes its cached pages stale
+            page_cache.clear()
+            refresh = True
+            invalidate_table_profile(connection, db_name, table_name)
+
+        page_length = page.length if page is not None else 0
+        if choice == 'n':
+            if view_start + PAGE_VIEW_ROWS < page_length:
+                view_start += PAGE_VIEW_ROWS
+            elif page_length < page_size:
+                add_log("No more rows")
+            else:
+                page_number += 1
+                view_start = 0
+
+        elif choice == 'p':
+            if view_start > 0:
+                view_start = max(0, view_start - PAGE_VIEW_ROWS)
+            elif page_number > 0:
+                page_number -= 1
+                view_start = -1
+            else:
+                add_log("Already on the first page")
+
+        elif choice == 's':
+            size_input = get_input(f"Rows per page (1-{PAGE_SIZE_MAX}): ")
+            if size_input.isdigit() and 1 <= int(size_input) <= PAGE_SIZE_MAX:
+                page_size = int(size_input)
+                page_number = 0
+                view_start = 0
+                page_cache.clear()
+                refresh = True
+                add_log(f"Page size set to {page_size}")
+            else:
+                add_log(f"Invalid page size: {size_input}")
+
+        elif choice == 'b':
             add_log(f"Returned to tables list")
             resize_window(99, 35)
             break
@@ -537,7 +1095,10 @@ def manage_table(connection, db_name, table_name):
                         add_log(f"Error: Row with {match_col}='{match_val}' not found!")
             except Exception as e:
                 add_log(f"Error updating cell: {e}")
-                
+
+        elif choice == '6':
+            show_table_profile(connection, db_name, table_name)
+
         else:
             add_log(f"Invalid choice: {choice}")
 
@@ -582,6 +1143,7 @@ def explore_tables(connection, db_name):
                         cursor.execute(f"CREATE TABLE `{new_table_name}` (id INT AUTO_INCREMENT PRIMARY KEY)")
                         connection.commit()
                         add_log(f"Table '{new_table_name}' created")
+                        invalidate_table_profile(connection, db_name, new_table_name)
                 except Exception as e:
                     add_log(f"Error creating table: {e}")
             continue
@@ -610,6 +1172,7 @@ def explore_tables(connection, db_name):
                             cursor.execute(f"DROP TABLE `{table_to_del}`")
                             connection.commit()
                             add_log(f"Table '{table_to_del}' deleted")
+                            invalidate_table_profile(connection, db_name, table_to_del)
                     except Exception as e:
                         add_log(f"Error deleting table: {e}")
             continue
@@ -620,6 +1183,248 @@ def explore_tables(connection, db_name):
         else:
             add_log(f"Invalid choice: {choice}")
 
+def target_label(target):
+    return f"{target.get('name', target['ip'])}/{target.get('database') or '-'}"
+
+class FanOutStopped(Exception):
+    pass
+
+def run_on_target(target, emit, stop, query, params=None, timeout=FANOUT_TIMEOUT, max_rows=None):
+    import pymysql.cursors
+    # Each worker thread gets its own connection: pymysql connections are not thread-safe
+    connection = open_connection(target['ip'], target['port'], target['user'], target['password'],
+                                 target.get('database'), timeout=timeout)
+    try:
+        # SSCursor streams the result, so a target never holds more than one batch in memory
+        cursor = connection.cursor(pymysql.cursors.SSCursor)
+        cursor.execute(query, params)
+        if cursor.description is None:
+            affected = cursor.rowcount
+            connection.commit()
+            emit(["affected"], [(affected,)])
+            return
+        columns = [desc[0] for desc in cursor.description]
+        fetched = 0
+        while not stop.is_set():
+            size = FANOUT_FETCH_BATCH if max_rows is None else min(FANOUT_FETCH_BATCH, max_rows - fetched)
+            if size <= 0:
+                break
+            batch = cursor.fetchmany(size)
+            if not batch:
+                break
+            fetched += len(batch)
+            emit(columns, batch)
+    finally:
+        # Closing the connection drops an unread result; SSCursor.close() would read it to the end
+        connection.close()
+
+def fan_out_query(sql, timeout=FANOUT_TIMEOUT, max_rows=None):
+    return partial(run_on_target, query=sql, timeout=timeout, max_rows=max_rows)
+
+def fan_out_find_table(pattern, timeout=FANOUT_TIMEOUT, max_rows=None):
+    # One query per server covers every schema, whether or not the template names a database
+    schemas = sorted(SYSTEM_SCHEMAS)
+    query = ("SELECT TABLE_SCHEMA AS table_schema, TABLE_NAME AS table_name, TABLE_ROWS AS table_rows "
+             "FROM information_schema.TABLES WHERE TABLE_NAME LIKE %s "
+             f"AND TABLE_SCHEMA NOT IN ({', '.join(['%s'] * len(schemas))}) "
+             "ORDER BY TABLE_SCHEMA, TABLE_NAME")
+    return partial(run_on_target, query=query, params=(pattern, *schemas), timeout=timeout, max_rows=max_rows)
+
+async def _run_target(loop, executor, semaphore, futures, queue, index, target, operation, timeout):
+    import asyncio
+    import threading
+    from concurrent.futures import TimeoutError as FutureTimeoutError
+    await semaphore.acquire()
+    stop = threading.Event()
+
+    def emit(columns, rows):
+        # Runs in the worker thread; blocks while the queue is full so a fast target
+        # cannot run ahead of the renderer, and gives up once the target is stopped
+        if stop.is_set():
+            raise FanOutStopped()
+        put = asyncio.run_coroutine_threadsafe(queue.put((index, ("rows", target, columns, rows))), loop)
+        while True:
+            if stop.is_set():
+                put.cancel()
+                raise FanOutStopped()
+            try:
+                put.result(0.1)
+                return
+            except FutureTimeoutError:
+                pass
+
+    future = loop.run_in_executor(executor, operation, target, emit, stop)
+    futures.append((future, stop))
+    # A timed-out thread keeps running, so its slot is freed only when it really ends;
+    # otherwise the next target's timer would start while it still waits in the executor queue
+    future.add_done_callback(lambda _: semaphore.release())
+    try:
+        await asyncio.wait_for(asyncio.shield(future), timeout)
+        event = ("done", target, None, None)
+    except asyncio.TimeoutError:
+        stop.set()
+        event = ("error", target, None, f"timed out after {timeout}s")
+    except Exception as e:
+        event = ("error", target, None, str(e))
+    await queue.put((index, event))
+
+async def fan_out(targets, operation, concurrency=FANOUT_CONCURRENCY, timeout=FANOUT_TIMEOUT):
+    # Yields events as they happen, merged across targets:
+    #   ("rows", target, columns, rows) - a batch of rows
+    #   ("done", target, None, None)    - the target finished
+    #   ("error", target, None, message)
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+    queue = asyncio.Queue(maxsize=FANOUT_QUEUE_SIZE)
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    futures = []
+    tasks = [loop.create_task(_run_target(loop, executor, semaphore, futures, queue, index, target, operation, timeout))
+             for index, target in enumerate(targets)]
+    try:
+        finished = set()
+        while len(finished) < len(tasks):
+            index, event = await queue.get()
+            if index in finished:
+                # A batch that was already queued when its target timed out
+                continue
+            if event[0] != "rows":
+                finished.add(index)
+            yield event
+    finally:
+        for task in tasks:
+            task.cancel()
+        for future, stop in futures:
+            stop.set()
+            future.cancel()
+        # Running threads cannot be interrupted; they stop at the next batch or on read_timeout
+        executor.shutdown(wait=False, cancel_futures=True)
+
+async def expand_schemas(templates, concurrency=FANOUT_CONCURRENCY, timeout=FANOUT_TIMEOUT):
+    targets = []
+    errors = []
+    list_schemas = partial(run_on_target, query="SHOW DATABASES", timeout=timeout)
+    async for kind, template, columns, payload in fan_out(templates, list_schemas, concurrency, timeout):
+        if kind == "error":
+            errors.append(f"{template['name']}: {payload}")
+        elif kind == "rows":
+            for (schema,) in payload:
+                if schema not in SYSTEM_SCHEMAS:
+                    targets.append(dict(template, database=schema))
+    return targets, errors
+
+def merge_result(headers, merged_rows, label, columns, rows):
+    # Targets may return different columns, so rows are kept as dicts until rendering
+    for col in columns:
+        if col not in headers:
+            headers.append(col)
+    for row in rows:
+        merged_rows.append((label, dict(zip(columns, row))))
+
+def render_fan_out(title, headers, merged_rows, done, total, errors):
+    from tabulate import tabulate
+    table_output = "(No rows yet)"
+    if merged_rows:
+        table_output = tabulate(
+            [[label] + [values.get(col) for col in headers] for label, values in merged_rows],
+            headers=["Target"] + headers,
+            tablefmt="grid"
+        )
+    table_lines = table_output.split('\n')
+    req_cols = max((len(line) for line in table_lines), default=0) + 4
+    # Title(1), Progress(1), Table(len), Errors(len+1), Gap(3), Prompt(1) = 7
+    resize_window(max(99, req_cols), len(table_lines) + len(errors) + len(USER_LOGS) + 7)
+    clear_screen()
+    print(f"=== {title} ===")
+    print(f"Done {done}/{total} (Ctrl+C to cancel)")
+    print(table_output)
+    if errors:
+        print("Errors:")
+        for error in errors:
+            print(error)
+
+async def show_fan_out(title, templates, operation, all_schemas):
+    targets, errors = templates, []
+    if all_schemas:
+        print("Listing schemas...")
+        targets, errors = await expand_schemas(templates)
+
+    headers = []
+    merged_rows = []
+    shown = {}
+    done = 0
+    render_fan_out(title, headers, merged_rows, done, len(targets), errors)
+    async for kind, target, columns, payload in fan_out(targets, operation):
+        label = target_label(target)
+        if kind == "rows":
+            # Operations fetch at most FANOUT_ROW_LIMIT + 1 rows, the extra one only tells that there are more
+            room = FANOUT_ROW_LIMIT - shown.get(label, 0)
+            merge_result(headers, merged_rows, label, columns, payload[:room])
+            shown[label] = shown.get(label, 0) + len(payload)
+            if shown[label] > FANOUT_ROW_LIMIT:
+                errors.append(f"{label}: showing the first {FANOUT_ROW_LIMIT} rows")
+        else:
+            done += 1
+            if kind == "error":
+                errors.append(f"{label}: {payload}")
+        render_fan_out(title, headers, merged_rows, done, len(targets), errors)
+
+def fan_out_menu(templates):
+    if not templates:
+        add_log("No templates to run on")
+        return
+
+    clear_screen()
+    print("--- Run on many templates ---")
+    for i, t in enumerate(templates):
+        db_name = t.get('database', 'No DB specified')
+        print(f"{i+1}. {t['name']} ({t['ip']}:{t['port']}) [{db_name}]")
+    print("-" * 20)
+
+    selection = get_input("Template numbers separated by commas (empty for all, b to cancel): ").lower()
+    if selection == 'b':
+        add_log("Fan-out cancelled")
+        return
+    selected = templates
+    if selection:
+        indexes = [part.strip() for part in selection.split(',')]
+        if not all(idx.isdigit() and 1 <= int(idx) <= len(templates) for idx in indexes):
+            add_log(f"Invalid template selection: {selection}")
+            return
+        selected = [templates[int(idx) - 1] for idx in indexes]
+
+    print("-" * 20)
+    print("1. Run query")
+    print("2. Find table")
+    action = get_input("Select action: ")
+    if action == '1':
+        sql = get_input("SQL: ")
+        if not sql:
+            add_log("Fan-out cancelled")
+            return
+        title, operation = f"Query on {len(selected)} template(s)", fan_out_query(sql, max_rows=FANOUT_ROW_LIMIT + 1)
+    elif action == '2':
+        pattern = get_input("Table name or LIKE pattern (e.g. user%): ")
+        if not pattern:
+            add_log("Fan-out cancelled")
+            return
+        title, operation = f"Find table '{pattern}'", fan_out_find_table(pattern, max_rows=FANOUT_ROW_LIMIT + 1)
+    else:
+        add_log(f"Invalid choice: {action}")
+        return
+
+    # Find table already searches every schema of each server
+    all_schemas = action == '1' and get_input("Run on every schema of each server? (y/n): ").lower() == 'y'
+    import asyncio
+    try:
+        asyncio.run(show_fan_out(title, selected, operation, all_schemas))
+    except KeyboardInterrupt:
+        add_log("Fan-out cancelled")
+        return
+    get_input("\nPress Enter to return to main menu...")
+    add_log(f"{title} finished")
+
 LOGO = r"""
  ██████╗  █████╗ ████████╗ █████╗ ██████╗ ███████╗███████╗    ██╗   ██╗████████╗██╗██╗     ███████╗
  ██╔══██╗██╔══██╗╚══██╔══╝██╔══██╗██╔══██╗██╔════╝██╔════╝    ██║   ██║╚══██╔══╝██║██║     ██╔════╝
@@ -632,8 +1437,8 @@ LOGO = r"""
 def main():
     while True:
         templates = load_templates()
-        # overhead: Logo(8), Menu(4), Sep(1), Templates(len), Sep(1), Exit(2), Gap(3), Prompt(1) = 20
-        req_lines = len(templates) + len(USER_LOGS) + 20
+        # overhead: Logo(8), Menu(5), Sep(1), Templates(len), Sep(1), Exit(2), Gap(3), Prompt(1) = 21
+        req_lines = len(templates) + len(USER_LOGS) + 21
         resize_window(99, req_lines)
         
         clear_screen()
@@ -642,9 +1447,10 @@ def main():
         print("1. Connect to DB (manual)")
         print("2. Create template")
         print("3. Delete template")
+        print("4. Run on many templates")
         
         print("-" * 20)
-        template_start_index = 4
+        template_start_index = 5
         for i, t in enumerate(templates):
             db_name = t.get('database', 'No DB specified')
             print(f"{template_start_index + i}. Connect ({t['name']}) - {t['ip']}:{t['port']} [{db_name}]")
@@ -714,6 +1520,9 @@ def main():
                 add_log(f"Template '{deleted['name']}' deleted")
             else:
                 add_log(f"Invalid delete choice: {del_choice}")
+
+        elif choice == '4':
+            fan_out_menu(templates)
                 
         elif choice.isdigit():
             choice_num = int(choice)
@@ -732,5 +1541,358 @@ def main():
         else:
             add_log(f"Invalid input: {choice}")
 
+# ---- Batch / CLI mode ----
+
+EXIT_OK = 0
+EXIT_ERROR = 1
+EXIT_USAGE = 2
+EXIT_CONNECTION = 3
+
+CLI_FETCH_BATCH = 1000
+CLI_IMPORT_BATCH = 1000
+
+class CliError(Exception):
+    def __init__(self, message, exit_code=EXIT_ERROR):
+        super().__init__(message)
+        self.exit_code = exit_code
+
+def _json_default(value):
+    if isinstance(value, (bytes, bytearray)):
+        return value.hex()
+    return str(value)
+
+def write_result(columns, rows, fmt, out=None):
+    # Rows are written as they arrive, so exports never sit in memory whole
+    out = out or sys.stdout
+    if fmt == "csv":
+        import csv
+        writer = csv.writer(out, lineterminator="\n")
+        writer.writerow(columns)
+        for row in rows:
+            writer.writerow([value.hex() if isinstance(value, (bytes, bytearray)) else value for value in row])
+        return
+    out.write("[")
+    for i, row in enumerate(rows):
+        out.write(",\n  " if i else "\n  ")
+        out.write(json.dumps(dict(zip(columns, row)), default=_json_default, ensure_ascii=False))
+    out.write("\n]\n")
+
+def _stream_rows(cursor):
+    while True:
+        batch = cursor.fetchmany(CLI_FETCH_BATCH)
+        if not batch:
+            break
+        yield from batch
+
+def _stream_query(connection, query, fmt, params=None):
+    import pymysql.cursors
+    cursor = connection.cursor(pymysql.cursors.SSCursor)
+    try:
+        cursor.execute(query, params)
+        if cursor.description is None:
+            affected = cursor.rowcount
+            connection.commit()
+            write_result(["affected"], [(affected,)], fmt)
+        else:
+            columns = [desc[0] for desc in cursor.description]
+            write_result(columns, _stream_rows(cursor), fmt)
+    finally:
+        cursor.close()
+
+def _read_import_rows(path, fmt, empty_as_null=False):
+    stream = sys.stdin if path == "-" else open(path, "r", encoding="utf-8", newline="")
+    try:
+        if fmt == "json":
+            data = json.load(stream)
+            if not isinstance(data, list) or not all(isinstance(item, dict) for item in data):
+                raise CliError("JSON import expects a list of objects", EXIT_USAGE)
+            # Union of keys in first-seen order; a key missing from an object is inserted as NULL
+            columns = list(dict.fromkeys(key for item in data for key in item))
+            # Nested objects and arrays go into JSON columns as JSON text
+            return columns, [
+                tuple(json.dumps(value, ensure_ascii=False) if isinstance(value, (dict, list)) else value
+                      for value in (item.get(col) for col in columns))
+                for item in data
+            ]
+        import csv
+        reader = csv.reader(stream)
+        columns = next(reader, [])
+        if not empty_as_null:
+            return columns, [tuple(row) for row in reader]
+        # CSV has no NULL, so empty fields are inserted as NULL on request
+        return columns, [tuple(value if value != "" else None for value in row) for row in reader]
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+def cli_import(connection, table_name, path, fmt, empty_as_null=False):
+    if fmt is None:
+        fmt = "json" if path.lower().endswith(".json") else "csv"
+    columns, rows = _read_import_rows(path, fmt, empty_as_null)
+    if not columns:
+        raise CliError("Nothing to import", EXIT_USAGE)
+
+    cols_str = ", ".join(f"`{col}`" for col in columns)
+    placeholders = ", ".join(["%s"] * len(columns))
+    query = f"INSERT INTO `{table_name}` ({cols_str}) VALUES ({placeholders})"
+    inserted = 0
+    try:
+        with connection.cursor() as cursor:
+            for start in range(0, len(rows), CLI_IMPORT_BATCH):
+                inserted += cursor.executemany(query, rows[start:start + CLI_IMPORT_BATCH]) or 0
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    return inserted
+
+def build_cli_parser():
+    import argparse
+    parser = argparse.ArgumentParser(
+        prog="db_manager.py",
+        description="Run Database Utils operations without the interactive menu. "
+                    "Without arguments the interactive menu is started."
+    )
+    parser.add_argument("-t", "--template", help="template name from data.json")
+    parser.add_argument("--host", help="server address (instead of a template)")
+    parser.add_argument("--port", default="3306", help="server port (default: 3306)")
+    parser.add_argument("--user", help="user name")
+    parser.add_argument("--password", default=None, help="password (default: $DB_PASSWORD)")
+    parser.add_argument("-d", "--database", help="database, overrides the template value")
+    parser.add_argument("-f", "--format", choices=["json", "csv"], help="output format (default: json)")
+
+    commands = parser.add_subparsers(dest="command", metavar="COMMAND")
+    commands.add_parser("templates", help="list saved templates")
+    _add_connection_commands(commands)
+    run = commands.add_parser("run", help="run commands from a script file, one per line ('-' for stdin)")
+    run.add_argument("script")
+    fanout = commands.add_parser("fanout", help="run one operation on many templates/schemas concurrently")
+    fanout.add_argument("action", choices=["query", "find-table"])
+    fanout.add_argument("argument", help="SQL for 'query', table name or LIKE pattern for 'find-table'")
+    fanout.add_argument("--templates", help="comma-separated template names (default: all templates)")
+    fanout.add_argument("--all-schemas", action="store_true", help="query: run on every non-system schema of each server (find-table always searches all schemas)")
+    fanout.add_argument("--concurrency", type=int, default=FANOUT_CONCURRENCY, help=f"default: {FANOUT_CONCURRENCY}")
+    fanout.add_argument("--timeout", type=float, default=FANOUT_TIMEOUT, help=f"seconds per target (default: {FANOUT_TIMEOUT})")
+    return parser
+
+def build_script_parser():
+    # Script lines share the connection given on the command line, so they accept
+    # no connection options and cannot silently send a statement elsewhere
+    import argparse
+    parser = argparse.ArgumentParser(prog="script line")
+    parser.add_argument("-f", "--format", choices=["json", "csv"], help="output format for this line")
+    commands = parser.add_subparsers(dest="command", metavar="COMMAND")
+    _add_connection_commands(commands)
+    return parser
+
+def _add_connection_commands(commands):
+    commands.add_parser("list", help="list tables")
+    describe = commands.add_parser("describe", help="show table columns")
+    describe.add_argument("table")
+    query = commands.add_parser("query", help="run an SQL statement")
+    query.add_argument("sql")
+    export = commands.add_parser("export", help="dump table rows")
+    export.add_argument("table")
+    export.add_argument("--limit", type=int, help="export at most N rows")
+    import_ = commands.add_parser("import", help="insert rows from a CSV (with header) or JSON file, '-' for stdin")
+    import_.add_argument("table")
+    import_.add_argument("file")
+    import_.add_argument("--input-format", choices=["json", "csv"], help="default: guessed from the file extension")
+    import_.add_argument("--empty-as-null", action="store_true", help="insert empty CSV fields as NULL instead of ''")
+    ddl = commands.add_parser("ddl", help="run a DDL statement (CREATE/ALTER/DROP ...)")
+    ddl.add_argument("sql")
+
+def cli_connect(args):
+    if args.template:
+        template = next((t for t in load_templates() if t.get("name") == args.template), None)
+        if template is None:
+            raise CliError(f"Template '{args.template}' not found in {CONFIG_FILE}", EXIT_USAGE)
+        ip, port, user, password = template["ip"], template["port"], template["user"], template["password"]
+        database = args.database or template.get("database")
+    elif args.host:
+        ip, port, user = args.host, args.port, args.user
+        password = args.password if args.password is not None else os.environ.get("DB_PASSWORD", "")
+        database = args.database
+    else:
+        raise CliError("Specify --template or --host", EXIT_USAGE)
+    if not database:
+        raise CliError("No database specified (use --database)", EXIT_USAGE)
+
+    try:
+        return open_connection(ip, port, user, password, database)
+    except Exception as e:
+        raise CliError(f"Connection error: {e}", EXIT_CONNECTION)
+
+def cli_execute(connection, args):
+    fmt = args.format
+    if args.command == "list":
+        with connection.cursor() as cursor:
+            cursor.execute("SHOW TABLES")
+            write_result(["table"], cursor.fetchall(), fmt)
+    elif args.command == "describe":
+        with connection.cursor() as cursor:
+            cursor.execute(f"DESCRIBE `{args.table}`")
+            columns = [desc[0] for desc in cursor.description]
+            write_result(columns, cursor.fetchall(), fmt)
+    elif args.command in ("query", "ddl"):
+        _stream_query(connection, args.sql, fmt)
+    elif args.command == "export":
+        query = f"SELECT * FROM `{args.table}`"
+        if args.limit is not None:
+            query += f" LIMIT {int(args.limit)}"
+        _stream_query(connection, query, fmt)
+    elif args.command == "import":
+        inserted = cli_import(connection, args.table, args.file, args.input_format, args.empty_as_null)
+        write_result(["inserted"], [(inserted,)], fmt)
+
+def _read_script(path):
+    import shlex
+    stream = sys.stdin if path == "-" else open(path, "r", encoding="utf-8")
+    try:
+        for line_no, line in enumerate(stream, 1):
+            line = line.strip()
+            if line and not line.startswith("#"):
+                yield line_no, shlex.split(line)
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+def cli_run_script(connection, args):
+    parser = build_script_parser()
+    for line_no, argv in _read_script(args.script):
+        try:
+            line_args = parser.parse_args(argv)
+        except SystemExit:
+            raise CliError(f"{args.script}:{line_no}: invalid command (connection options, templates, run "
+                           f"and fanout are not allowed in scripts)", EXIT_USAGE)
+        if line_args.command is None:
+            raise CliError(f"{args.script}:{line_no}: missing command", EXIT_USAGE)
+        # The connection comes from the command line, the format may be set per line
+        line_args.format = line_args.format or args.format
+        try:
+            cli_execute(connection, line_args)
+        except CliError:
+            raise
+        except Exception as e:
+            raise CliError(f"{args.script}:{line_no}: {e}")
+
+class RowStreamWriter:
+    def __init__(self, fmt, out=None):
+        self.fmt = fmt
+        self.out = out or sys.stdout
+        self.count = 0
+        self.csv_writer = None
+        self.fieldnames = None
+
+    def write(self, record):
+        if self.fmt == "csv":
+            fieldnames = list(record)
+            if fieldnames != self.fieldnames:
+                import csv
+                # One CSV has one header: refuse rather than drop or misplace columns
+                if self.csv_writer is not None:
+                    raise CliError(
+                        f"Targets returned different columns ({', '.join(self.fieldnames)} vs "
+                        f"{', '.join(fieldnames)}); use -f json for mixed results"
+                    )
+                self.fieldnames = fieldnames
+                self.csv_writer = csv.DictWriter(self.out, fieldnames=fieldnames, lineterminator="\n")
+                self.csv_writer.writeheader()
+            self.csv_writer.writerow({k: v.hex() if isinstance(v, (bytes, bytearray)) else v for k, v in record.items()})
+        else:
+            self.out.write(",\n  " if self.count else "[\n  ")
+            self.out.write(json.dumps(record, default=_json_default, ensure_ascii=False))
+        self.count += 1
+
+    def close(self):
+        if self.fmt == "json":
+            self.out.write("\n]\n" if self.count else "[]\n")
+        self.out.flush()
+
+async def _cli_fan_out(args, templates, operation):
+    failed = 0
+    targets = templates
+    if args.all_schemas and args.action == "query":
+        targets, errors = await expand_schemas(templates, args.concurrency, args.timeout)
+        for error in errors:
+            print(error, file=sys.stderr)
+        failed += len(errors)
+
+    writer = RowStreamWriter(args.format)
+    async for kind, target, columns, payload in fan_out(targets, operation, args.concurrency, args.timeout):
+        label = target_label(target)
+        if kind == "error":
+            print(f"{label}: {payload}", file=sys.stderr)
+            failed += 1
+        elif kind == "rows":
+            for row in payload:
+                writer.write({"target": label, **dict(zip(columns, row))})
+            sys.stdout.flush()
+    writer.close()
+    return failed
+
+def cli_fan_out(args):
+    templates = load_templates()
+    if args.templates:
+        names = [name.strip() for name in args.templates.split(",")]
+        by_name = {t.get("name"): t for t in templates}
+        missing = [name for name in names if name not in by_name]
+        if missing:
+            raise CliError(f"Template(s) not found in {CONFIG_FILE}: {', '.join(missing)}", EXIT_USAGE)
+        templates = [by_name[name] for name in names]
+    if not templates:
+        raise CliError("No templates to run on", EXIT_USAGE)
+    if args.concurrency < 1:
+        raise CliError("--concurrency must be at least 1", EXIT_USAGE)
+    if args.timeout <= 0:
+        raise CliError("--timeout must be greater than 0", EXIT_USAGE)
+
+    if args.action == "query":
+        operation = fan_out_query(args.argument, args.timeout)
+    else:
+        operation = fan_out_find_table(args.argument, args.timeout)
+    import asyncio
+    failed = asyncio.run(_cli_fan_out(args, templates, operation))
+    return EXIT_ERROR if failed else EXIT_OK
+
+def run_cli(argv):
+    parser = build_cli_parser()
+    args = parser.parse_args(argv)
+    if args.command is None:
+        parser.print_help(sys.stderr)
+        return EXIT_USAGE
+    args.format = args.format or "json"
+
+    connection = None
+    try:
+        if args.command == "templates":
+            rows = [(t.get("name"), t.get("ip"), t.get("port"), t.get("user"), t.get("database")) for t in load_templates()]
+            write_result(["name", "ip", "port", "user", "database"], rows, args.format)
+            return EXIT_OK
+
+        if args.command == "fanout":
+            return cli_fan_out(args)
+
+        connection = cli_connect(args)
+        if args.command == "run":
+            cli_run_script(connection, args)
+        else:
+            cli_execute(connection, args)
+        return EXIT_OK
+    except CliError as e:
+        print(e, file=sys.stderr)
+        return e.exit_code
+    except KeyboardInterrupt:
+        print("Interrupted", file=sys.stderr)
+        return 130
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return EXIT_ERROR
+    finally:
+        if connection is not None:
+            connection.close()
+
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(run_cli(sys.argv[1:]))
     main()